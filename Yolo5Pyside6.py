@@ -3,94 +3,187 @@ import os
 import subprocess
 import ctypes
 import signal  # 补充导入signal模块以处理SIGINT
+import threading
+from functools import partial
 from pathlib import Path
 import time
-from PySide6.QtWidgets import *
-from PySide6.QtCore import QThread, Signal, QSettings, QTimer
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QGroupBox, QPushButton, QLineEdit,
+    QPlainTextEdit, QComboBox, QSpinBox, QFileDialog, QMessageBox,
+    QHBoxLayout, QVBoxLayout, QFormLayout
+)
+from PySide6.QtCore import (Qt, QObject, Signal, QSettings, QTimer,
+                            QSocketNotifier)
 from PySide6.QtGui import QFont
 
-# Windows API定义
-if os.name == 'nt':
-    kernel32 = ctypes.windll.kernel32
-
-class TrainThread(QThread):
+class TrainProcess(QObject):
+    """管理训练子进程：POSIX下用QSocketNotifier在GUI事件循环里读管道，
+    省掉整个读线程；Windows匿名管道无法被QSocketNotifier监听，
+    回退到一个阻塞读取的后台线程。"""
     update_log = Signal(str)
     finished = Signal()
     error_occurred = Signal(str)
-    _running = True
 
-    def __init__(self, command, cwd=None):
-        super().__init__()
+    def __init__(self, command, cwd=None, parent=None):
+        super().__init__(parent)
         self.command = command
         self.cwd = cwd
         self.process = None
         self.pid = None
-
-    def run(self):
+        self._running = False
+        self._notifier = None
+        self._reader = None
+        self._tail = bytearray()
+        self._buf = []
+        self._last_flush = time.monotonic()
+
+    def start(self):
         try:
-            self._running = True
             # 创建独立的进程组（仅限Windows）
             creationflags = 0
             if os.name == 'nt':
                 creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-            
+
+            # 扩大内核管道缓冲区到1MiB，减少训练进程写阻塞和读端唤醒次数
+            popen_kwargs = {}
+            if sys.version_info >= (3, 10):
+                popen_kwargs['pipesize'] = 1024 * 1024
+
             self.process = subprocess.Popen(
                 self.command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
+                bufsize=-1,  # 使用系统默认缓冲，减少逐行read()系统调用
                 cwd=self.cwd,
-                shell=True if os.name == 'nt' else False,
-                creationflags=creationflags
+                env=os.environ | {"PYTHONUNBUFFERED": "1"},
+                # 命令已是完整的参数列表，不经过cmd.exe，
+                # CTRL_C_EVENT才能直达train.py进程
+                shell=False,
+                creationflags=creationflags,
+                **popen_kwargs
             )
+            if sys.version_info < (3, 10) and sys.platform.startswith('linux'):
+                # 旧版Python没有pipesize参数，直接用F_SETPIPE_SZ(1031)设置
+                import fcntl
+                try:
+                    fcntl.fcntl(self.process.stdout.fileno(), 1031, 1 << 20)
+                except OSError:
+                    pass
             self.pid = self.process.pid
-            
-            for line in iter(self.process.stdout.readline, ''):
-                self.update_log.emit(line.strip())
             self._running = True
-            while self._running:
-                line = self.process.stdout.readline()
-                if not line:  # 管道关闭时退出循环
-                    break
-                self.update_log.emit(line.strip())
-            self.process.wait()
-            if self.process.returncode != 0:
-                self.error_occurred.emit(f"训练异常结束，错误码：{self.process.returncode}")
+
+            fd = self.process.stdout.fileno()
+            if os.name == 'nt':
+                self._reader = threading.Thread(target=self._read_blocking,
+                                                daemon=True)
+                self._reader.start()
             else:
-                self.finished.emit()
+                os.set_blocking(fd, False)
+                self._notifier = QSocketNotifier(fd, QSocketNotifier.Read,
+                                                 self)
+                self._notifier.activated.connect(self._on_ready_read)
         except Exception as e:
-            if "I/O operation on closed file" in str(e):
-                self.error_occurred.emit("训练已安全终止")
-            else:
-                self.error_occurred.emit(f"运行时错误: {str(e)}")
-        finally:
-            self._running = False
+            self.error_occurred.emit(f"运行时错误: {str(e)}")
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _feed(self, chunk):
+        """二进制块累积+按批解码，避免逐行decode/strip的Python开销"""
+        self._tail += chunk
+        *lines, rest = self._tail.split(b'\n')
+        self._tail = bytearray(rest)
+        self._buf.extend(line.rstrip(b'\r') for line in lines)
+        now = time.monotonic()
+        if len(self._buf) >= 64 or (self._buf and
+                                    now - self._last_flush > 0.05):
+            self._flush()
+            self._last_flush = now
+
+    def _flush(self):
+        if self._buf:
+            self.update_log.emit(
+                b'\n'.join(self._buf).decode('utf-8', 'replace'))
+            self._buf.clear()
+
+    def _on_ready_read(self):
+        fd = self.process.stdout.fileno()
+        while self._running:
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                chunk = b''
+            if not chunk:  # 管道关闭
+                self._handle_eof()
+                return
+            self._feed(chunk)
+
+    def _read_blocking(self):
+        """Windows回退路径：后台线程阻塞读取"""
+        fd = self.process.stdout.fileno()
+        while self._running:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                chunk = b''
+            if not chunk:
+                break
+            self._feed(chunk)
+        self._handle_eof()
+
+    def _handle_eof(self):
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+        if self._tail:
+            self._buf.append(bytes(self._tail).rstrip(b'\r'))
+            self._tail = bytearray()
+        self._flush()
+        self.process.wait()
+        self._running = False
+        if self.process.returncode != 0:
+            self.error_occurred.emit(
+                f"训练异常结束，错误码：{self.process.returncode}")
+        else:
+            self.finished.emit()
+
+    def shutdown(self):
+        """停止读取并回收读取资源（通知器/回退线程）"""
+        self._running = False
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+        if self._reader is not None and self._reader.is_alive():
+            self._reader.join(1)
 
     def send_ctrl_c(self):
-        """发送终止信号时同时停止读取循环"""
-        self._running = False  # 停止读取循环
-        start_time = time.time()
-        if self.process and self.process.poll() is None:
+        """发送终止信号并停止读取；等待与强杀由调用方分阶段调度，
+        这里不做任何阻塞等待"""
+        self._running = False  # 停止读取
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+        if self.process is None:
+            # 启动失败时未赋值process，直接返回避免AttributeError
+            return
+        if self.process.poll() is None:
             if os.name == 'nt':
-                # Windows发送CTRL_C_EVENT
-                kernel32.GenerateConsoleCtrlEvent(0, self.pid)
+                # Windows发送CTRL_C_EVENT（用到时才解析kernel32）
+                ctypes.windll.kernel32.GenerateConsoleCtrlEvent(0, self.pid)
             else:
                 # Linux/Mac发送SIGINT
                 os.killpg(os.getpgid(self.pid), signal.SIGINT)
-            self.wait(1000)  # 等待1秒
-        #超时检测
-        while self.process.poll() is None and (time.time() - start_time) < 3:
-            time.sleep(0.1)
-        if self.process.poll() is None:
-            self.process.kill()
-        
+
 
 class YOLOTrainer(QMainWindow):
     def __init__(self):
         super().__init__()
+        self._stat_cache = {}
+        self._cmd_cache = {}
+        # 复用同一个QSettings实例，避免每次保存/读取都重新打开存储后端
+        self.settings_obj = QSettings("YOLOv5Trainer", "Config")
         self.setup_paths()
         self.initUI()
-        self.train_thread = None
+        self.train_proc = None
 
     def setup_paths(self):
         self.settings = {
@@ -112,11 +205,14 @@ class YOLOTrainer(QMainWindow):
         self.font.setPointSize(10)
 
     def create_widgets(self):
-        # 路径配置部分
-        self.yolov5_root_group = self.create_path_group("YOLOv5根目录", is_file=False)
-        self.venv_python_group = self.create_path_group("Python环境路径", is_file=True)
-        self.data_yaml_group = self.create_path_group("数据集配置文件", is_file=True, 
-                                                     filter="YAML文件 (*.yaml *.yml)")
+        # 路径配置部分（保存输入框引用，避免之后反复findChild遍历）
+        self.yolov5_root_group, self.yolov5_root_edit = \
+            self.create_path_group("YOLOv5根目录", is_file=False)
+        self.venv_python_group, self.venv_python_edit = \
+            self.create_path_group("Python环境路径", is_file=True)
+        self.data_yaml_group, self.data_yaml_edit = \
+            self.create_path_group("数据集配置文件", is_file=True,
+                                   filter="YAML文件 (*.yaml *.yml)")
         # 训练参数部分
         self.model_select = QComboBox()
         self.model_select.addItems(['yolov5s', 'yolov5m', 'yolov5l', 'yolov5x'])
@@ -130,6 +226,10 @@ class YOLOTrainer(QMainWindow):
         self.batch_size.setRange(1, 64)
         self.batch_size.setValue(2)
 
+        # 参数变化时丢弃缓存的命令行
+        self.epochs.valueChanged.connect(self._invalidate_cmd_cache)
+        self.batch_size.valueChanged.connect(self._invalidate_cmd_cache)
+
         # 按钮部分
         self.train_btn = QPushButton("开始训练")
         self.train_btn.clicked.connect(self.start_training)
@@ -137,24 +237,29 @@ class YOLOTrainer(QMainWindow):
         self.stop_btn.clicked.connect(self.stop_training)
         self.stop_btn.setEnabled(False)
 
-        # 日志部分
-        self.log_output = QTextEdit()
+        # 日志部分：QPlainTextEdit对日志式追加做过优化，且可限制总行数
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.setMaximumBlockCount(10000)
+        self.log_output.setUndoRedoEnabled(False)
 
     def create_path_group(self, title, is_file=False, filter=None):
-        """创建包含路径输入框和浏览按钮的完整组"""
+        """创建包含路径输入框和浏览按钮的完整组，返回(组, 输入框)"""
         group = QGroupBox(title)
         layout = QHBoxLayout(group)
-        
-        self.line_edit = QLineEdit()
-        self.line_edit.setFont(self.font)
-        self.browse_btn = QPushButton("浏览...")
-        self.browse_btn.clicked.connect(
-            lambda: self.select_path(self.line_edit, is_file, filter=filter))
-        
-        layout.addWidget(self.line_edit)
-        layout.addWidget(self.browse_btn)
-        return group
+
+        # 使用局部变量，避免self.line_edit被下一次调用覆盖导致
+        # 浏览按钮操作到错误的输入框；partial在连接时绑定参数，
+        # 触发时不需要再建Python闭包栈帧
+        line_edit = QLineEdit()
+        line_edit.setFont(self.font)
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(
+            partial(self.select_path, line_edit, is_file, filter=filter))
+
+        layout.addWidget(line_edit)
+        layout.addWidget(browse_btn)
+        return group, line_edit
 
     def create_layout(self):
         main_widget = QWidget()
@@ -216,25 +321,40 @@ class YOLOTrainer(QMainWindow):
 
         if path:
             target_input.setText(Path(path).as_posix())
+            self._cmd_cache.clear()  # 路径变化后重新解析命令
+
+    def _invalidate_cmd_cache(self, *args):
+        self._cmd_cache.clear()
+
+    def _probe(self, path):
+        """stat一次并缓存结果，同一次点击内不重复发起系统调用"""
+        key = str(path)
+        if key not in self._stat_cache:
+            try:
+                self._stat_cache[key] = os.stat(key)
+            except OSError:
+                self._stat_cache[key] = None
+        return self._stat_cache[key]
 
     def validate_paths(self):
         errors = []
-        # 修改后的路径检查方式
+        self._stat_cache = {}
+        # 修改后的路径检查方式（stat结果缓存供start_training复用）
         path_checks = [
-            (self.yolov5_root_group, 
-             "YOLOv5根目录", 
-             lambda p: (p/"train.py").exists()),
-            (self.venv_python_group, 
-             "Python环境路径", 
-             lambda p: p.exists() and "python" in p.name.lower()),
-            (self.data_yaml_group, 
-             "数据集配置文件", 
-             lambda p: p.exists() and p.suffix in ['.yaml', '.yml'])
+            (self.yolov5_root_edit,
+             "YOLOv5根目录",
+             lambda p: self._probe(p/"train.py") is not None),
+            (self.venv_python_edit,
+             "Python环境路径",
+             lambda p: "python" in p.name.lower()),
+            (self.data_yaml_edit,
+             "数据集配置文件",
+             lambda p: p.suffix in {'.yaml', '.yml'})
         ]
 
-        for group, name, validator in path_checks:
-            path = Path(self.get_path_from_group(group))
-            if not path.exists():
+        for edit, name, validator in path_checks:
+            path = Path(edit.text())
+            if self._probe(path) is None:
                 errors.append(f"{name}不存在")
             elif not validator(path):
                 errors.append(f"{name}无效")
@@ -247,84 +367,110 @@ class YOLOTrainer(QMainWindow):
             return
 
         self.save_settings()
-        yolov5_root = Path(self.get_path_from_group(self.yolov5_root_group))
-        venv_python = Path(self.get_path_from_group(self.venv_python_group))
-        data_yaml = Path(self.get_path_from_group(self.data_yaml_group))
+        yolov5_root = Path(self.yolov5_root_edit.text())
+        venv_python = Path(self.venv_python_edit.text())
+        data_yaml = Path(self.data_yaml_edit.text())
         
-        # 构造命令时需要验证模型文件路径
+        # 构造命令时需要验证模型文件路径：一次scandir读出models目录，
+        # 代替对单个文件逐一stat
         model_file = yolov5_root / "models" / f"{self.model_select.currentText()}.yaml"
-        if not model_file.exists():
+        try:
+            model_names = {entry.name for entry in os.scandir(yolov5_root / "models")}
+        except OSError:
+            model_names = set()
+        if model_file.name not in model_names:
             QMessageBox.critical(self, "错误", f"模型配置文件 {model_file} 不存在")
             return
 
         # 构造权重文件路径时需要验证
         weights_file = yolov5_root / f"{self.model_select.currentText()}.pt"
-        if not weights_file.exists():
+        if self._probe(weights_file) is None:
             QMessageBox.critical(self, "错误", f"预训练权重 {weights_file} 不存在")
             return
-        command = [
-            str(venv_python.resolve()),
-            str((yolov5_root / "train.py").resolve()),
-            '--img', '640',
-            '--batch', str(self.batch_size.value()),
-            '--epochs', str(self.epochs.value()),
-            '--data', str(data_yaml.resolve()),  # 直接使用选择的YAML文件
-            '--cfg', str(model_file.resolve()),
-            '--weights', str(weights_file.resolve())
-        ]
+        # 路径.resolve()每次都要逐级readlink/stat，按输入参数缓存命令行
+        cache_key = (self.yolov5_root_edit.text(),
+                     self.venv_python_edit.text(),
+                     self.data_yaml_edit.text(),
+                     self.model_select.currentText(),
+                     self.epochs.value(),
+                     self.batch_size.value())
+        command = self._cmd_cache.get(cache_key)
+        if command is None:
+            command = [
+                str(venv_python.resolve()),
+                '-u',  # 子进程stdout不做块缓冲，日志逐行即时可见
+                str((yolov5_root / "train.py").resolve()),
+                '--img', '640',
+                '--batch', str(self.batch_size.value()),
+                '--epochs', str(self.epochs.value()),
+                '--data', str(data_yaml.resolve()),  # 直接使用选择的YAML文件
+                '--cfg', str(model_file.resolve()),
+                '--weights', str(weights_file.resolve())
+            ]
+            self._cmd_cache[cache_key] = command
 
         self.log_output.clear()
-        self.train_thread = TrainThread(command, cwd=yolov5_root)
-        self.train_thread.update_log.connect(self.log_output.append)
-        self.train_thread.finished.connect(self.training_finished)
-        self.train_thread.error_occurred.connect(self.show_error)
-        self.train_thread.start()
+        self.train_proc = TrainProcess(command, cwd=yolov5_root, parent=self)
+        # update_log必须排队送回GUI线程；批量发送后每批只有一次跨线程分发
+        self.train_proc.update_log.connect(self.log_output.appendPlainText,
+                                             Qt.QueuedConnection)
+        self.train_proc.finished.connect(self.training_finished)
+        self.train_proc.error_occurred.connect(self.show_error)
+        self.train_proc.start()
 
         self.train_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
 
     def stop_training(self):
-        if self.train_thread and self.train_thread.isRunning():
+        if self.train_proc and self.train_proc.is_running():
             self.stop_btn.setEnabled(False)
-            self.log_output.append("正在发送停止信号...")
+            self.log_output.appendPlainText("正在发送停止信号...")
             
             # 使用异步操作避免阻塞
             QTimer.singleShot(0, self._safe_stop_training)
 
     def _safe_stop_training(self):
-        """安全的停止训练流程"""
+        """安全的停止训练流程：分阶段调度，事件循环保持响应"""
         try:
-            # 发送Ctrl+C信号
-            self.train_thread.send_ctrl_c()
-            
-            # 检查是否真正退出
-            if self.train_thread.isRunning():
-                self.log_output.append("进程未正常退出，尝试强制终止...")
-                self.train_thread.process.kill()
-                self.train_thread.wait(1000)
-                
-            self.training_finished()
+            # 发送Ctrl+C信号，1秒后再检查是否退出
+            self.train_proc.send_ctrl_c()
         except Exception as e:
-            self.log_output.append(f"停止失败: {str(e)}")
-        finally:
+            self.log_output.appendPlainText(f"停止失败: {str(e)}")
             self.stop_btn.setEnabled(True)
+            return
+        QTimer.singleShot(1000, self._check_stopped)
+
+    def _check_stopped(self):
+        """阶段2：仍未退出则强制终止，再等0.5秒收尾"""
+        proc = self.train_proc.process if self.train_proc else None
+        if proc is not None and proc.poll() is None:
+            self.log_output.appendPlainText("进程未正常退出，尝试强制终止...")
+            proc.kill()
+            QTimer.singleShot(500, self._finalize_stop)
+        else:
+            self._finalize_stop()
+
+    def _finalize_stop(self):
+        """阶段3：清理资源并恢复按钮状态"""
+        self.training_finished()
 
     def training_finished(self):
         """清理资源"""
-        if self.train_thread:
-            try:
-                if self.train_thread.process:
-                    self.train_thread.process.stdout.close()
-                    self.train_thread.process.stderr.close()
-                    self.train_thread.process = None
-            except:
-                pass
-            self.train_thread.quit()
-            self.train_thread.wait()
-            
+        if self.train_proc:
+            self.train_proc.shutdown()
+            proc = self.train_proc.process
+            if proc is not None:
+                if proc.poll() is None:
+                    proc.wait()
+                # 子进程退出后再关读端，读取循环以干净的EOF结束，
+                # 不会再走"I/O operation on closed file"异常路径
+                if proc.stdout is not None:
+                    proc.stdout.close()
+                self.train_proc.process = None
+
         self.train_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.log_output.append("训练已停止")
+        self.log_output.appendPlainText("训练已停止")
 
     def show_error(self, message):
         QMessageBox.critical(self, "训练错误", message)
@@ -332,7 +478,8 @@ class YOLOTrainer(QMainWindow):
 
     def closeEvent(self, event):
         self.save_settings()
-        if self.train_thread and self.train_thread.isRunning():
+        self.settings_obj.sync()
+        if self.train_proc and self.train_proc.is_running():
             reply = QMessageBox.question(
                 self, '训练正在进行',
                 "训练仍在运行，确定要退出吗？",
@@ -346,21 +493,16 @@ class YOLOTrainer(QMainWindow):
         else:
             event.accept()
 
-    def get_path_from_group(self, group):
-        """从路径组中获取输入框内容"""
-        return group.findChild(QLineEdit).text()
-
     def save_settings(self):
-        settings = QSettings("YOLOv5Trainer", "Config")
-        settings.setValue("yolov5_root", self.get_path_from_group(self.yolov5_root_group))
-        settings.setValue("venv_python", self.get_path_from_group(self.venv_python_group))
-        settings.setValue("data_yaml", self.get_path_from_group(self.data_yaml_group))
+        # 只写内存中的设置，落盘交给closeEvent里的一次sync()
+        self.settings_obj.setValue("yolov5_root", self.yolov5_root_edit.text())
+        self.settings_obj.setValue("venv_python", self.venv_python_edit.text())
+        self.settings_obj.setValue("data_yaml", self.data_yaml_edit.text())
 
     def load_settings(self):
-        settings = QSettings("YOLOv5Trainer", "Config")
-        self.yolov5_root_group.findChild(QLineEdit).setText(settings.value("yolov5_root", ""))
-        self.venv_python_group.findChild(QLineEdit).setText(settings.value("venv_python", ""))
-        self.data_yaml_group.findChild(QLineEdit).setText(settings.value("data_yaml", ""))
+        self.yolov5_root_edit.setText(self.settings_obj.value("yolov5_root", ""))
+        self.venv_python_edit.setText(self.settings_obj.value("venv_python", ""))
+        self.data_yaml_edit.setText(self.settings_obj.value("data_yaml", ""))
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = YOLOTrainer()
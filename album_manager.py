@@ -1,32 +1,145 @@
 import sys
 import os
+import shutil
 import sqlite3
+import threading
 from datetime import datetime
+from functools import partial
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QListWidget,
     QPushButton, QLabel, QGridLayout, QScrollArea, QFileDialog, QMessageBox,
     QSizePolicy, QListWidgetItem, QToolBar, QStatusBar, QFormLayout, 
-    QLineEdit, QGroupBox, QInputDialog, QFrame, QStyleFactory, QMenu
+    QLineEdit, QGroupBox, QInputDialog, QFrame, QStyleFactory, QMenu,
+    QProgressDialog
 )
 from PySide6.QtGui import (
-    QIcon, QPixmap, QImage, QAction, QColor, QPalette, QBrush,
-    QPainter, QCursor
+    QIcon, QPixmap, QImage, QImageReader, QPixmapCache, QAction, QColor,
+    QPalette, QBrush, QPainter, QCursor
 )
-from PySide6.QtCore import Qt, QSize, QDir, QDateTime, QPoint, QRect
+from PySide6.QtCore import (
+    Qt, QSize, QDir, QDateTime, QPoint, QRect, QBuffer, QObject,
+    QRunnable, QThread, QThreadPool, QTimer, Signal
+)
+
+# 热点SQL用模块级常量：字符串对象全程唯一，sqlite3语句缓存稳定命中
+_SQL_ADD_IMAGE = (
+    "INSERT INTO images "
+    "(album_id, file_path, file_name, file_size, add_time) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+# 缩略图BLOB独立存放在image_thumbs，元数据扫描不碰大行
+_SQL_GET_IMAGES = (
+    "SELECT id, file_path, file_name, file_size, add_time "
+    "FROM images WHERE album_id = ?"
+)
+_SQL_GET_IMAGE_COUNT = "SELECT COUNT(*) FROM images WHERE album_id = ?"
+_SQL_SET_THUMB = (
+    "INSERT OR REPLACE INTO image_thumbs (image_id, thumbnail) "
+    "VALUES (?, ?)"
+)
+
+
+def fast_copy(src, dst):
+    """平台原生的文件拷贝：Linux走os.sendfile在内核内搬运，
+    Windows调CopyFileW，其余平台退回shutil.copyfile；保留mtime"""
+    st = os.stat(src)
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        in_fd = os.open(src, os.O_RDONLY)
+        try:
+            out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+            try:
+                while os.sendfile(out_fd, in_fd, None, 1 << 20):
+                    pass
+            finally:
+                os.close(out_fd)
+        finally:
+            os.close(in_fd)
+    elif os.name == 'nt':
+        import ctypes
+        if not ctypes.windll.kernel32.CopyFileW(src, dst, False):
+            raise OSError(f"CopyFileW失败: {src}")
+    else:
+        shutil.copyfile(src, dst)
+    os.utime(dst, (st.st_atime, st.st_mtime))
+
 
 class DatabaseManager:
     """数据库管理类，负责图片集和图片的存储"""
     def __init__(self, db_path="album_manager.db"):
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        # 每线程一个连接：WAL下后台预取/导入可与UI查询并行
+        self._local = threading.local()
+        # 会话内读缓存：选相册/切主题等热路径不再反复查库，
+        # 写操作时按键失效
+        self._album_cache = {}
+        self._albums_cache = None
+        self._images_cache = {}
+        self._count_cache = {}
+        # 建库专用PRAGMA必须赶在WAL写入文件头之前执行，
+        # 这里先判断是否全新数据库，连接创建时据此走初始化分支
+        self._fresh_db = (not os.path.exists(db_path)
+                          or os.path.getsize(db_path) == 0)
         self.initialize_database()
+
+    def _invalidate_album(self, album_id=None):
+        """相册元数据变化后失效对应缓存"""
+        self._albums_cache = None
+        if album_id is None:
+            self._album_cache.clear()
+        else:
+            self._album_cache.pop(album_id, None)
+
+    def _invalidate_images(self, album_id=None):
+        """图片增删后失效对应图片列表/计数缓存"""
+        if album_id is None:
+            self._images_cache.clear()
+            self._count_cache.clear()
+        else:
+            self._images_cache.pop(album_id, None)
+            self._count_cache.pop(album_id, None)
     
+    def _apply_pragmas(self, conn):
+        """每个新连接统一应用调优PRAGMA。
+        WAL下写提交只需一次fsync且读写互不阻塞（数据库旁会多出
+        *.db-wal/*.db-shm两个伴随文件，属正常现象）；
+        64MB页缓存加mmap让相册/图片B树常驻内存"""
+        conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        PRAGMA mmap_size=268435456;
+        PRAGMA foreign_keys=ON;
+        PRAGMA busy_timeout=3000;
+        """)
+
+    @property
+    def conn(self):
+        """当前线程的数据库连接，首次访问时创建并应用PRAGMA"""
+        if not hasattr(self._local, 'conn'):
+            # 加大语句缓存，热点SQL不用每次重新parse/plan
+            self._local.conn = sqlite3.connect(
+                self.db_path, cached_statements=256,
+                check_same_thread=False)
+            if self._fresh_db:
+                # 8K页装下更多images行，B树更浅、一次I/O取到更多元数据。
+                # 增量vacuum配合close()里的incremental_vacuum分批回收空闲页。
+                # 两者都只能在数据库文件头写入前设置，要抢在WAL等PRAGMA之前
+                self._local.conn.execute("PRAGMA page_size = 8192")
+                self._local.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self._fresh_db = False
+            self._apply_pragmas(self._local.conn)
+        return self._local.conn
+
+    @property
+    def cursor(self):
+        """当前线程连接上的游标"""
+        if not hasattr(self._local, 'cursor'):
+            self._local.cursor = self.conn.cursor()
+        return self._local.cursor
+
     def initialize_database(self):
         """初始化数据库和表结构"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.cursor = self.conn.cursor()
-        
         # 创建图片集表
         self.cursor.execute("""
         CREATE TABLE IF NOT EXISTS albums (
@@ -44,16 +157,33 @@ class DatabaseManager:
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             album_id INTEGER NOT NULL,
             file_path TEXT NOT NULL,
-            thumbnail BLOB,
             file_name TEXT NOT NULL,
             file_size INTEGER,
             add_time TEXT NOT NULL,
             FOREIGN KEY (album_id) REFERENCES albums(id) ON DELETE CASCADE
         )
         """)
-        
+
+        # 缩略图BLOB单独成表：images叶子页只装紧凑的元数据行，
+        # 按album_id的范围扫描不再把大BLOB一起翻进页缓存
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS image_thumbs (
+            image_id INTEGER PRIMARY KEY
+                REFERENCES images(id) ON DELETE CASCADE,
+            thumbnail BLOB NOT NULL
+        ) WITHOUT ROWID
+        """)
+
+        # images表的查询/删除都按album_id过滤，建索引避免全表扫描。
+        # rowid表的索引项在同一键内按rowid有序，网格查询的
+        # WHERE album_id = ? ORDER BY id也由它直接满足；
+        # albums.name的UNIQUE约束自带唯一索引，查重无需另建
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_images_album_id ON images(album_id)
+        """)
+
         self.conn.commit()
-    
+
     def create_album(self, name, notes=""):
         """创建新图片集"""
         current_time = datetime.now().isoformat()
@@ -63,15 +193,19 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?)
             """, (name, current_time, current_time, notes))
             self.conn.commit()
+            self._invalidate_album()
             return self.cursor.lastrowid
         except sqlite3.IntegrityError:
             return None
     
     def delete_album(self, album_id):
         """删除图片集及其所有图片"""
-        self.cursor.execute("DELETE FROM albums WHERE id = ?", (album_id,))
-        self.cursor.execute("DELETE FROM images WHERE album_id = ?", (album_id,))
-        self.conn.commit()
+        # foreign_keys=ON后ON DELETE CASCADE由引擎级联删除images，
+        # with self.conn保证单事务原子提交
+        with self.conn:
+            self.cursor.execute("DELETE FROM albums WHERE id = ?", (album_id,))
+        self._invalidate_album(album_id)
+        self._invalidate_images(album_id)
     
     def update_album_notes(self, album_id, notes):
         """更新图片集备注"""
@@ -82,19 +216,57 @@ class DatabaseManager:
         WHERE id = ?
         """, (notes, current_time, album_id))
         self.conn.commit()
-    
+        self._invalidate_album(album_id)
+
+    def rename_album(self, album_id, new_name):
+        """重命名图片集，成功返回True，名称冲突返回False"""
+        current_time = datetime.now().isoformat()
+        try:
+            self.cursor.execute("""
+            UPDATE albums
+            SET name = ?, modify_time = ?
+            WHERE id = ?
+            """, (new_name, current_time, album_id))
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            return False
+        self._invalidate_album(album_id)
+        return True
+
     def get_all_albums(self):
         """获取所有图片集"""
-        self.cursor.execute("SELECT id, name, create_time, modify_time, notes FROM albums")
-        return self.cursor.fetchall()
-    
+        if self._albums_cache is None:
+            self.cursor.execute("SELECT id, name, create_time, modify_time, notes FROM albums")
+            self._albums_cache = self.cursor.fetchall()
+        return self._albums_cache
+
     def get_album(self, album_id):
         """获取单个图片集信息"""
+        if album_id not in self._album_cache:
+            self.cursor.execute("""
+            SELECT id, name, create_time, modify_time, notes
+            FROM albums WHERE id = ?
+            """, (album_id,))
+            self._album_cache[album_id] = self.cursor.fetchone()
+        return self._album_cache[album_id]
+
+    def get_album_with_count(self, album_id):
+        """一次查询取回相册信息和图片数，选相册热路径专用"""
+        if album_id in self._album_cache and album_id in self._count_cache:
+            return (tuple(self._album_cache[album_id])
+                    + (self._count_cache[album_id],))
         self.cursor.execute("""
-        SELECT id, name, create_time, modify_time, notes 
-        FROM albums WHERE id = ?
+        SELECT a.id, a.name, a.create_time, a.modify_time, a.notes,
+               (SELECT COUNT(*) FROM images WHERE album_id = a.id)
+        FROM albums a WHERE a.id = ?
         """, (album_id,))
-        return self.cursor.fetchone()
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        # 顺手填充两份缓存，后续单独的get_album/get_image_count也命中
+        self._album_cache[album_id] = row[:5]
+        self._count_cache[album_id] = row[5]
+        return row
     
     def add_image(self, album_id, file_path, thumbnail_data=None):
         """添加图片到图片集"""
@@ -102,31 +274,95 @@ class DatabaseManager:
         file_size = os.path.getsize(file_path)
         add_time = datetime.now().isoformat()
         
-        self.cursor.execute("""
-        INSERT INTO images (album_id, file_path, thumbnail, file_name, file_size, add_time)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (album_id, file_path, thumbnail_data, file_name, file_size, add_time))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.conn:
+            self.cursor.execute(_SQL_ADD_IMAGE,
+                                (album_id, file_path,
+                                 file_name, file_size, add_time))
+            image_id = self.cursor.lastrowid
+            if thumbnail_data is not None:
+                self.cursor.execute(_SQL_SET_THUMB,
+                                    (image_id, thumbnail_data))
+        self._invalidate_images(album_id)
+        return image_id
     
+    def add_images_bulk(self, album_id, records):
+        """批量添加图片：一个事务一次executemany，整批只有一次fsync。
+        records为(file_path, file_name, file_size)元组，由调用方预先算好"""
+        add_time = datetime.now().isoformat()
+        rows = [
+            (album_id, file_path, file_name, file_size, add_time)
+            for file_path, file_name, file_size in records
+        ]
+        with self.conn:
+            self.cursor.executemany(_SQL_ADD_IMAGE, rows)
+            # 修改时间在同一事务里更新，不再多付一次提交
+            self.cursor.execute(
+                "UPDATE albums SET modify_time = ? WHERE id = ?",
+                (add_time, album_id))
+        self._invalidate_images(album_id)
+        self._invalidate_album(album_id)
+        return len(rows)
+
     def delete_image(self, image_id):
         """删除图片"""
         self.cursor.execute("DELETE FROM images WHERE id = ?", (image_id,))
         self.conn.commit()
+        self._invalidate_images()  # 不知道所属相册，整体失效
+
+    def delete_images_bulk(self, album_id, image_ids):
+        """批量删除图片：IN子句一条语句、一个事务，
+        修改时间一并更新。按999切块避开SQLite变量数上限"""
+        current_time = datetime.now().isoformat()
+        with self.conn:
+            for start in range(0, len(image_ids), 999):
+                chunk = image_ids[start:start + 999]
+                placeholders = ",".join("?" * len(chunk))
+                self.cursor.execute(
+                    f"DELETE FROM images WHERE id IN ({placeholders})",
+                    chunk)
+            self.cursor.execute(
+                "UPDATE albums SET modify_time = ? WHERE id = ?",
+                (current_time, album_id))
+        self._invalidate_images(album_id)
+        self._invalidate_album(album_id)
     
     def get_images(self, album_id):
         """获取图片集的所有图片"""
+        if album_id not in self._images_cache:
+            self.cursor.execute(_SQL_GET_IMAGES, (album_id,))
+            self._images_cache[album_id] = self.cursor.fetchall()
+        return self._images_cache[album_id]
+
+    def get_images_for_grid(self, album_id):
+        """网格显示专用：元数据连同缩略图BLOB一次LEFT JOIN取回，
+        每个widget零额外查询。BLOB体积大，结果不进内存缓存"""
         self.cursor.execute("""
-        SELECT id, file_path, thumbnail, file_name, file_size, add_time 
-        FROM images 
-        WHERE album_id = ?
+        SELECT i.id, i.file_path, i.file_name, t.thumbnail
+        FROM images i LEFT JOIN image_thumbs t ON t.image_id = i.id
+        WHERE i.album_id = ? ORDER BY i.id
         """, (album_id,))
         return self.cursor.fetchall()
-    
+
+    def get_thumbnail(self, image_id):
+        """按需读取单张图片的缩略图数据"""
+        self.cursor.execute(
+            "SELECT thumbnail FROM image_thumbs WHERE image_id = ?",
+            (image_id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def set_thumbnail(self, image_id, thumbnail_data):
+        """写入/更新单张图片的缩略图缓存；连接按线程隔离，
+        worker线程可直接调用"""
+        with self.conn:
+            self.cursor.execute(_SQL_SET_THUMB, (image_id, thumbnail_data))
+
     def get_image_count(self, album_id):
         """获取图片集中的图片数量"""
-        self.cursor.execute("SELECT COUNT(*) FROM images WHERE album_id = ?", (album_id,))
-        return self.cursor.fetchone()[0]
+        if album_id not in self._count_cache:
+            self.cursor.execute(_SQL_GET_IMAGE_COUNT, (album_id,))
+            self._count_cache[album_id] = self.cursor.fetchone()[0]
+        return self._count_cache[album_id]
     
     def update_album_modify_time(self, album_id):
         """更新图片集的修改时间"""
@@ -137,17 +373,48 @@ class DatabaseManager:
         WHERE id = ?
         """, (current_time, album_id))
         self.conn.commit()
+        self._invalidate_album(album_id)
     
     def close(self):
-        """关闭数据库连接"""
-        if self.conn:
-            self.conn.close()
+        """关闭当前线程的数据库连接，先刷新查询计划统计"""
+        if hasattr(self._local, 'conn'):
+            conn = self._local.conn
+            # 限制分析工作量后运行optimize，保持索引统计新鲜
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("PRAGMA optimize")
+            # 有限度地归还空闲页，避免删相册后文件越积越大
+            conn.execute("PRAGMA incremental_vacuum(100)")
+            conn.close()
+            del self._local.conn
+            if hasattr(self._local, 'cursor'):
+                del self._local.cursor
 
 class ThemeManager:
     """主题管理器，支持深色和浅色主题切换"""
-    @staticmethod
-    def apply_dark_theme(app):
+    # (palette, qss)首次使用时构建，之后每次切换直接复用
+    _dark_theme = None
+    _light_theme = None
+
+    @classmethod
+    def apply_dark_theme(cls, app):
         """应用深色主题"""
+        if cls._dark_theme is None:
+            cls._dark_theme = cls._build_dark_theme()
+        palette, qss = cls._dark_theme
+        app.setPalette(palette)
+        app.setStyleSheet(qss)
+
+    @classmethod
+    def apply_light_theme(cls, app):
+        """应用浅色主题"""
+        if cls._light_theme is None:
+            cls._light_theme = cls._build_light_theme()
+        palette, qss = cls._light_theme
+        app.setPalette(palette)
+        app.setStyleSheet(qss)
+
+    @staticmethod
+    def _build_dark_theme():
         palette = QPalette()
         
         # 基础颜色
@@ -169,10 +436,8 @@ class ThemeManager:
         palette.setColor(QPalette.Disabled, QPalette.WindowText, QColor("#bdc3c7"))
         palette.setColor(QPalette.Disabled, QPalette.Text, QColor("#bdc3c7"))
         palette.setColor(QPalette.Disabled, QPalette.ButtonText, QColor("#bdc3c7"))
-        
-        app.setPalette(palette)
-        
-        app.setStyleSheet("""
+
+        qss = ("""
             /* 主窗口 */
             QMainWindow {
                 background-color: #2c3e50;
@@ -300,11 +565,30 @@ class ThemeManager:
                 background-color: #3498db;
                 border-radius: 4px;
             }
+
+            /* 图片缩略图卡片（选中态用动态属性切换） */
+            ImageWidget {
+                background-color: #3d566e;
+                border: 1px solid #7f8c8d;
+                border-radius: 8px;
+            }
+            ImageWidget[selected="true"] {
+                border: 2px solid #3498db;
+            }
+            QLabel#imageThumb {
+                background-color: #34495e;
+                border: 1px dashed #7f8c8d;
+                border-radius: 6px;
+            }
+            QLabel#imageName {
+                color: #bdc3c7;
+                font-size: 11px;
+            }
         """)
+        return palette, qss
 
     @staticmethod
-    def apply_light_theme(app):
-        """应用浅色主题"""
+    def _build_light_theme():
         palette = QPalette()
         
         # 基础颜色
@@ -326,10 +610,8 @@ class ThemeManager:
         palette.setColor(QPalette.Disabled, QPalette.WindowText, QColor("#6c757d"))
         palette.setColor(QPalette.Disabled, QPalette.Text, QColor("#6c757d"))
         palette.setColor(QPalette.Disabled, QPalette.ButtonText, QColor("#6c757d"))
-        
-        app.setPalette(palette)
-        
-        app.setStyleSheet("""
+
+        qss = ("""
             /* 主窗口 */
             QMainWindow {
                 background-color: #f8f9fa;
@@ -461,92 +743,208 @@ class ThemeManager:
                 color: white;
                 border-radius: 4px;
             }
+
+            /* 图片缩略图卡片（选中态用动态属性切换） */
+            ImageWidget {
+                background-color: #ffffff;
+                border: 1px solid #ced4da;
+                border-radius: 8px;
+            }
+            ImageWidget[selected="true"] {
+                border: 2px solid #0d6efd;
+            }
+            QLabel#imageThumb {
+                background-color: #f8f9fa;
+                border: 1px dashed #ced4da;
+                border-radius: 6px;
+            }
+            QLabel#imageName {
+                color: #6c757d;
+                font-size: 11px;
+            }
         """)
+        return palette, qss
+
+class ThumbnailTask(QRunnable):
+    """后台解码缩略图：QImageReader按目标尺寸解码（JPEG走IDCT缩放），
+    结果通过信号排队送回GUI线程。传入db和image_id时顺带把
+    JPEG编码后的缩略图写回数据库，下次显示免解码原图"""
+
+    class Signals(QObject):
+        done = Signal(QImage)
+
+    def __init__(self, file_path, target_size, db=None, image_id=None):
+        super().__init__()
+        self.file_path = file_path
+        self.target_size = target_size
+        self.db = db
+        self.image_id = image_id
+        self.signals = ThumbnailTask.Signals()
+
+    def run(self):
+        reader = QImageReader(self.file_path)
+        reader.setAutoTransform(True)  # 按EXIF方向旋转, 避免再补一次transformed()
+        size = reader.size()
+        if size.isValid():
+            size.scale(self.target_size, Qt.KeepAspectRatio)
+            reader.setScaledSize(size)
+        image = reader.read()
+        if not image.isNull():
+            self.signals.done.emit(image)
+            if self.db is not None and self.image_id is not None:
+                # 编码和入库都在worker线程完成（连接是每线程独立的）
+                buffer = QBuffer()
+                buffer.open(QBuffer.WriteOnly)
+                if image.save(buffer, "JPEG", 80):
+                    self.db.set_thumbnail(self.image_id,
+                                          bytes(buffer.data()))
+
+
+class ImportTask(QRunnable):
+    """后台准备导入：stat所有文件并预解码缩略图，
+    结果一次性送回GUI线程做单事务入库"""
+
+    class Signals(QObject):
+        done = Signal(list, list)  # (records, thumbs)
+
+    def __init__(self, file_paths, target_size):
+        super().__init__()
+        self.file_paths = file_paths
+        self.target_size = target_size
+        self.signals = ImportTask.Signals()
+
+    def run(self):
+        records = []   # (file_path, file_name, file_size)
+        thumbs = []    # (cache_key, QImage)
+        for file_path in self.file_paths:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            records.append((file_path, os.path.basename(file_path),
+                            st.st_size))
+            reader = QImageReader(file_path)
+            reader.setAutoTransform(True)
+            size = reader.size()
+            if size.isValid():
+                size.scale(self.target_size, Qt.KeepAspectRatio)
+                reader.setScaledSize(size)
+            image = reader.read()
+            if not image.isNull():
+                thumbs.append(
+                    (f"{file_path}:{st.st_mtime}:{st.st_size}:170x150",
+                     image))
+        self.signals.done.emit(records, thumbs)
+
+
+class CopyRunnable(QRunnable):
+    """后台执行单个文件拷贝，完成与否通过信号回GUI线程计数"""
+
+    class Signals(QObject):
+        done = Signal(bool)
+
+    def __init__(self, src, dst):
+        super().__init__()
+        self.src = src
+        self.dst = dst
+        self.signals = CopyRunnable.Signals()
+
+    def run(self):
+        try:
+            fast_copy(self.src, self.dst)
+        except Exception as e:
+            print(f"导出图片失败: {e}")
+            self.signals.done.emit(False)
+        else:
+            self.signals.done.emit(True)
+
 
 class ImageWidget(QWidget):
     """自定义图片小部件，用于显示缩略图和文件名"""
-    def __init__(self, image_id, file_path, file_name, parent=None):
+    def __init__(self, image_id, file_path, file_name, parent=None, db=None,
+                 thumb_blob=None):
         super().__init__(parent)
         self.image_id = image_id
         self.file_path = file_path
         self.file_name = file_name
+        self.db = db
+        # 网格查询随行带回的缩略图BLOB，省一次按id的SELECT
+        self._thumb_blob = thumb_blob
         self.is_selected = False
         self.setFixedSize(180, 200)
-        
-        # 设置样式
-        if parent and parent.is_dark_theme:
-            self.setStyleSheet("""
-                background-color: #3d566e;
-                border: 1px solid #7f8c8d;
-                border-radius: 8px;
-            """)
-        else:
-            self.setStyleSheet("""
-                background-color: #ffffff;
-                border: 1px solid #ced4da;
-                border-radius: 8px;
-            """)
-        
+
+        # 样式统一放在主题QSS里，这里只挂选中态动态属性；
+        # 纯QWidget子类要吃QSS背景需要WA_StyledBackground
+        self.setAttribute(Qt.WA_StyledBackground, True)
+        self.setProperty("selected", False)
+
         # 布局
         layout = QVBoxLayout(self)
         layout.setContentsMargins(5, 5, 5, 5)
         layout.setSpacing(5)
-        
+
         # 图片标签
         self.image_label = QLabel()
+        self.image_label.setObjectName("imageThumb")
         self.image_label.setFixedSize(170, 150)
         self.image_label.setAlignment(Qt.AlignCenter)
-        
-        # 根据当前主题设置样式
-        if parent and parent.is_dark_theme:
-            self.image_label.setStyleSheet("""
-                background-color: #34495e;
-                border: 1px dashed #7f8c8d;
-                border-radius: 6px;
-            """)
-        else:
-            self.image_label.setStyleSheet("""
-                background-color: #f8f9fa;
-                border: 1px dashed #ced4da;
-                border-radius: 6px;
-            """)
-        
         layout.addWidget(self.image_label)
-        
+
         # 图片名称
         self.name_label = QLabel(file_name)
+        self.name_label.setObjectName("imageName")
         self.name_label.setAlignment(Qt.AlignCenter)
-        
-        # 根据当前主题设置样式
-        if parent and parent.is_dark_theme:
-            self.name_label.setStyleSheet("""
-                color: #bdc3c7;
-                font-size: 11px;
-            """)
-        else:
-            self.name_label.setStyleSheet("""
-                color: #6c757d;
-                font-size: 11px;
-            """)
-        
         layout.addWidget(self.name_label)
-        
-        # 加载缩略图
-        self.load_thumbnail()
+
+        # 缩略图不在构造时解码，由视口可见性驱动加载
+        self.thumb_loaded = False
+        self._task = None
     
     def load_thumbnail(self):
-        """加载图片缩略图"""
-        if os.path.exists(self.file_path):
-            pixmap = QPixmap(self.file_path)
-            if not pixmap.isNull():
-                # 缩放图片以适应标签
-                scaled_pixmap = pixmap.scaled(
-                    self.image_label.width(), 
-                    self.image_label.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                self.image_label.setPixmap(scaled_pixmap)
+        """加载图片缩略图：命中QPixmapCache直接显示，否则交给线程池解码"""
+        self.thumb_loaded = True
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            return
+        # mtime+size一起进键：就地覆盖的同秒改动也不会吃到旧图
+        self._cache_key = (
+            f"{self.file_path}:{st.st_mtime}:{st.st_size}:170x150")
+        pixmap = QPixmap()
+        if QPixmapCache.find(self._cache_key, pixmap):
+            self.image_label.setPixmap(pixmap)
+            return
+        # 数据库里缓存过的缩略图只需loadFromData小JPEG，不碰原图；
+        # 网格查询已随行带回BLOB，通常不再需要单独SELECT
+        blob = self._thumb_blob
+        if blob is None and self.db is not None:
+            blob = self.db.get_thumbnail(self.image_id)
+        if blob and pixmap.loadFromData(blob):
+            self._thumb_blob = None  # 进了QPixmapCache就不用再留着
+            QPixmapCache.insert(self._cache_key, pixmap)
+            self.image_label.setPixmap(pixmap)
+            return
+        task = ThumbnailTask(self.file_path,
+                             QSize(self.image_label.width(),
+                                   self.image_label.height()),
+                             db=self.db, image_id=self.image_id)
+        task.signals.done.connect(self._set_thumbnail)
+        # 留一个引用，切相册时还排在队里的任务可以被撤销
+        self._task = task
+        QThreadPool.globalInstance().start(task)
+
+    def cancel_pending_load(self):
+        """把尚未开始执行的解码任务从线程池队列里撤掉"""
+        if self._task is not None:
+            QThreadPool.globalInstance().tryTake(self._task)
+            self._task = None
+
+    def _set_thumbnail(self, image):
+        """线程池解码完成后回到GUI线程设置并缓存缩略图"""
+        self._task = None
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(self._cache_key, pixmap)
+        self.image_label.setPixmap(pixmap)
     
     def mousePressEvent(self, event):
         """处理鼠标点击事件"""
@@ -555,26 +953,11 @@ class ImageWidget(QWidget):
         super().mousePressEvent(event)
     
     def update_border(self):
-        """更新边框以显示选中状态"""
-        if self.is_selected:
-            self.setStyleSheet("""
-                background-color: #3d566e;
-                border: 2px solid #3498db;
-                border-radius: 8px;
-            """)
-        else:
-            if self.parent() and self.parent().is_dark_theme:
-                self.setStyleSheet("""
-                    background-color: #3d566e;
-                    border: 1px solid #7f8c8d;
-                    border-radius: 8px;
-                """)
-            else:
-                self.setStyleSheet("""
-                    background-color: #ffffff;
-                    border: 1px solid #ced4da;
-                    border-radius: 8px;
-                """)
+        """更新边框以显示选中状态：切换动态属性并重新抛光，
+        不再逐widget重新解析QSS"""
+        self.setProperty("selected", self.is_selected)
+        self.style().unpolish(self)
+        self.style().polish(self)
 
 class AlbumManager(QMainWindow):
     def __init__(self):
@@ -732,6 +1115,13 @@ class AlbumManager(QMainWindow):
         
         self.scroll_area.setWidget(self.scroll_content)
         self.image_layout.addWidget(self.scroll_area)
+
+        # 滚动时按需加载进入视口的缩略图；窗口拉大/最大化不改变
+        # 滚动条值但会改变其范围，rangeChanged补上这类几何变化
+        self.scroll_area.verticalScrollBar().valueChanged.connect(
+            self._load_visible_thumbnails)
+        self.scroll_area.verticalScrollBar().rangeChanged.connect(
+            self._load_visible_thumbnails)
         
         self.right_layout.addWidget(self.image_area, 1)  # 设置伸缩因子为1，使图片区域占据更多空间
         
@@ -787,6 +1177,16 @@ class AlbumManager(QMainWindow):
         # 当前选中的相册ID
         self.current_album_id = None
 
+        # 导出用的有界线程池，首次导出时创建
+        self._export_pool = None
+
+        # 连续删除相册时合并选中动作：停200ms才真正加载下一个相册
+        self._pending_item = None
+        self._select_timer = QTimer(self)
+        self._select_timer.setSingleShot(True)
+        self._select_timer.setInterval(200)
+        self._select_timer.timeout.connect(self._do_pending_select)
+
     def apply_current_theme(self):
         """应用当前选择的主题"""
         app = QApplication.instance()
@@ -797,12 +1197,11 @@ class AlbumManager(QMainWindow):
             ThemeManager.apply_light_theme(app)
             self.status_bar.showMessage("已切换到浅色主题", 3000)
         
-        # # 更新图片显示以匹配新主题
-        # if self.current_album_id:
-        #     self.show_album_images(self.current_album_id)
-         # 只有当有选中的相册时才显示图片
-        if hasattr(self, 'current_album_id') and self.current_album_id:
-            self.show_album_images(self.current_album_id)
+        # 缩略图与主题无关, 只需让现有控件重新应用样式, 不必重建整个网格
+        style = app.style()
+        for widget in self.findChildren(ImageWidget):
+            style.unpolish(widget)
+            style.polish(widget)
 
     def load_albums(self):
         """从数据库加载图片集"""
@@ -822,21 +1221,51 @@ class AlbumManager(QMainWindow):
 
     def show_album_images(self, album_id):
         """显示图片集中的图片"""
-        # 清空现有图片
+        # 整体换掉旧容器：一次deleteLater级联销毁整棵子树，
+        # 比逐个itemAt/deleteLater少N次事件投递
         self.selected_images = []
-        for i in reversed(range(self.grid_layout.count())): 
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        
-        # 获取图片
-        images = self.db.get_images(album_id)
-        
-        # 添加新图片
+        old_content = self.scroll_area.takeWidget()
+        if old_content is not None:
+            # 快速连点相册时，把上一个相册还没开始解码的任务
+            # 从线程池队列撤掉，worker不浪费在马上要丢弃的结果上
+            for widget in old_content.findChildren(ImageWidget):
+                widget.cancel_pending_load()
+            old_content.deleteLater()
+        self.scroll_content = QWidget()
+        self.grid_layout = QGridLayout(self.scroll_content)
+        self.grid_layout.setAlignment(Qt.AlignTop)
+        self.grid_layout.setSpacing(20)
+        self.grid_layout.setContentsMargins(15, 15, 15, 15)
+        self.scroll_area.setWidget(self.scroll_content)
+
+        # 一条JOIN取回元数据和缩略图BLOB，每个widget零额外查询
+        images = self.db.get_images_for_grid(album_id)
+
+        # 添加新图片（解码延迟到进入视口）。
+        # 关掉更新批量addWidget，布局/重绘只在最后做一轮
+        self.scroll_content.setUpdatesEnabled(False)
         for i, image in enumerate(images):
-            image_id, file_path, _, file_name, _, _ = image
-            image_widget = ImageWidget(image_id, file_path, file_name, self)
+            image_id, file_path, file_name, thumb = image
+            image_widget = ImageWidget(image_id, file_path, file_name, self,
+                                       db=self.db, thumb_blob=thumb)
             self.grid_layout.addWidget(image_widget, i // 4, i % 4)
+        self.grid_layout.activate()
+        self.scroll_content.setUpdatesEnabled(True)
+
+        # 等布局计算完几何后再判定哪些缩略图可见
+        QTimer.singleShot(0, self._load_visible_thumbnails)
+
+    def _load_visible_thumbnails(self, *args):
+        """只解码视口内以及向下一屏预读范围内的缩略图"""
+        viewport = self.scroll_area.viewport()
+        # 向下多看一屏，滚动到达前缩略图已经在解码
+        reach = viewport.rect().adjusted(0, 0, 0, viewport.height())
+        for i in range(self.grid_layout.count()):
+            widget = self.grid_layout.itemAt(i).widget()
+            if isinstance(widget, ImageWidget) and not widget.thumb_loaded:
+                top_left = widget.mapTo(viewport, QPoint(0, 0))
+                if reach.intersects(QRect(top_left, widget.size())):
+                    widget.load_thumbnail()
 
     def add_album(self):
         """添加新相册"""
@@ -896,37 +1325,49 @@ class AlbumManager(QMainWindow):
                 self.modify_time_label.setText("")
                 self.image_count_label.setText("0")
                 self.notes_edit.setText("")
-                # 清空图片区域
-                for i in reversed(range(self.grid_layout.count())): 
-                    widget = self.grid_layout.itemAt(i).widget()
-                    if widget:
-                        widget.deleteLater()
+                # 清空图片区域：不在任何子控件自己的槽里，
+                # 直接takeAt+脱离父对象同步释放，不往事件队列投N个销毁事件
+                while (item := self.grid_layout.takeAt(0)) is not None:
+                    widget = item.widget()
+                    if widget is not None:
+                        widget.setParent(None)
+                        del widget
             else:
-                # 选择下一个相册
+                # 选择下一个相册；加载延迟200ms，连续删除不重复解码
                 if row >= self.album_list.count():
                     row = self.album_list.count() - 1
                 if row >= 0:
                     self.album_list.setCurrentRow(row)
-                    self.select_album(self.album_list.currentItem())
+                    self._pending_item = self.album_list.currentItem()
+                    self._select_timer.start()
+
+    def _do_pending_select(self):
+        """防抖定时器到期后真正加载待选相册"""
+        item, self._pending_item = self._pending_item, None
+        if item is not None:
+            self.select_album(item)
 
     def select_album(self, item):
         """选择相册并显示内容"""
         if not item:
             return
 
+        # 显式选择优先，撤销还在防抖等待中的延迟选择
+        self._select_timer.stop()
+        self._pending_item = None
+
         # 获取相册ID
         album_id = item.data(Qt.UserRole)
         self.current_album_id = album_id
         
-        # 获取相册信息
-        album = self.db.get_album(album_id)
+        # 相册信息和图片数一条语句取回
+        album = self.db.get_album_with_count(album_id)
         if album:
-            album_id, name, create_time, modify_time, notes = album
-            
+            album_id, name, create_time, modify_time, notes, image_count = album
+
             # 更新详情面板
             self.create_time_label.setText(create_time)
             self.modify_time_label.setText(modify_time)
-            image_count = self.db.get_image_count(album_id)
             self.image_count_label.setText(str(image_count))
             self.notes_edit.setText(notes)
             
@@ -935,9 +1376,37 @@ class AlbumManager(QMainWindow):
             
             # 显示图片
             self.show_album_images(album_id)
-            
+
             self.status_bar.showMessage(f"已选择图片集: {name}")
 
+            # 后台预热相邻相册，下次切换直接命中缓存
+            QTimer.singleShot(0, self._prefetch_neighbor_albums)
+
+    def _prefetch_neighbor_albums(self, max_per_album=16):
+        """预解码上/下相邻相册的前几张缩略图进QPixmapCache"""
+        row = self.album_list.currentRow()
+        for neighbor in (row - 1, row + 1):
+            if not 0 <= neighbor < self.album_list.count():
+                continue
+            album_id = self.album_list.item(neighbor).data(Qt.UserRole)
+            for image in self.db.get_images(album_id)[:max_per_album]:
+                _, file_path, _, _, _ = image
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                key = f"{file_path}:{st.st_mtime}:{st.st_size}:170x150"
+                pixmap = QPixmap()
+                if QPixmapCache.find(key, pixmap):
+                    continue
+                task = ThumbnailTask(file_path, QSize(170, 150))
+                task.signals.done.connect(partial(self._cache_prefetched, key))
+                QThreadPool.globalInstance().start(task)
+
+    def _cache_prefetched(self, key, image):
+        """预取解码完成后写入全局QPixmapCache"""
+        QPixmapCache.insert(key, QPixmap.fromImage(image))
+
     def add_image(self):
         """添加图片到当前相册"""
         if not self.current_album_id:
@@ -951,20 +1420,37 @@ class AlbumManager(QMainWindow):
         )
         
         if file_paths:
-            # 添加图片到数据库
-            for file_path in file_paths:
-                self.db.add_image(self.current_album_id, file_path)
-            
-            # 更新图片集修改时间
-            self.db.update_album_modify_time(self.current_album_id)
-            
-            # 更新UI
-            image_count = self.db.get_image_count(self.current_album_id)
+            # stat和缩略图解码都放线程池，UI线程不碰文件I/O；
+            # 完成后回到主线程做一次批量入库
+            self.status_bar.showMessage(f"正在导入 {len(file_paths)} 张图片...")
+            task = ImportTask(file_paths, QSize(170, 150))
+            task.signals.done.connect(
+                partial(self._finish_import, self.current_album_id))
+            QThreadPool.globalInstance().start(task)
+
+    def _finish_import(self, album_id, records, thumbs):
+        """导入准备完成：单事务批量入库、预热缩略图缓存、刷新UI"""
+        if not records:
+            self.status_bar.showMessage("没有可导入的图片", 3000)
+            return
+        # 解码期间相册可能已被删除，入库前确认它还在，
+        # 否则外键约束会在GUI槽里抛IntegrityError
+        if self.db.get_album(album_id) is None:
+            self.status_bar.showMessage("目标图片集已被删除，导入取消", 3000)
+            return
+        # 批量入库，修改时间随同一事务更新
+        self.db.add_images_bulk(album_id, records)
+
+        # 后台已解码的缩略图直接进QPixmapCache，显示时零解码
+        for key, image in thumbs:
+            QPixmapCache.insert(key, QPixmap.fromImage(image))
+
+        # 更新UI（导入期间可能已切换相册）
+        if album_id == self.current_album_id:
+            image_count = self.db.get_image_count(album_id)
             self.image_count_label.setText(str(image_count))
-            self.status_bar.showMessage(f"已添加 {len(file_paths)} 张图片")
-            
-            # 刷新图片显示
-            self.show_album_images(self.current_album_id)
+            self.show_album_images(album_id)
+        self.status_bar.showMessage(f"已添加 {len(records)} 张图片")
 
     def delete_image(self):
         """删除选中的图片"""
@@ -991,13 +1477,10 @@ class AlbumManager(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # 从数据库删除
-            for image_id in selected_images:
-                self.db.delete_image(image_id)
-            
-            # 更新图片集修改时间
-            self.db.update_album_modify_time(self.current_album_id)
-            
+            # 一条IN子句一个事务删完，修改时间随事务更新
+            self.db.delete_images_bulk(self.current_album_id,
+                                       selected_images)
+
             # 更新UI
             image_count = self.db.get_image_count(self.current_album_id)
             self.image_count_label.setText(str(image_count))
@@ -1060,25 +1543,69 @@ class AlbumManager(QMainWindow):
         # 获取图片
         images = self.db.get_images(self.current_album_id)
         
-        # 导出图片
-        exported_count = 0
+        # 按目录分组做存在性检查：每目录一次scandir顶掉逐文件stat，
+        # 网络盘上readdir一次往返便覆盖整个目录
+        by_dir = {}
         for image in images:
-            image_id, file_path, _, file_name, _, _ = image
-            if os.path.exists(file_path):
-                try:
-                    # 复制文件到导出目录
-                    import shutil
-                    shutil.copy2(file_path, os.path.join(album_dir, file_name))
-                    exported_count += 1
-                except Exception as e:
-                    print(f"导出图片失败: {e}")
-        
-        self.status_bar.showMessage(f"已导出 {exported_count}/{len(images)} 张图片到 {album_dir}", 5000)
-        QMessageBox.information(
-            self, 
-            "导出完成", 
-            f"已成功导出 {exported_count} 张图片到:\n{album_dir}"
-        )
+            image_id, file_path, file_name, _, _ = image
+            by_dir.setdefault(os.path.dirname(file_path), []).append(
+                (file_path, file_name))
+
+        jobs = []
+        for directory, entries in by_dir.items():
+            if len(entries) == 1:
+                # 单文件目录直接stat，不值得扫整个目录
+                file_path, file_name = entries[0]
+                if os.path.exists(file_path):
+                    jobs.append((file_path,
+                                 os.path.join(album_dir, file_name)))
+                continue
+            try:
+                present = {entry.name for entry in os.scandir(directory)}
+            except OSError:
+                continue
+            for file_path, file_name in entries:
+                if os.path.basename(file_path) in present:
+                    jobs.append((file_path,
+                                 os.path.join(album_dir, file_name)))
+
+        if not jobs:
+            QMessageBox.information(self, "导出完成", "没有可导出的图片")
+            return
+
+        self._export_dir = album_dir
+        self._export_total = len(jobs)
+        self._export_done = 0
+        self._export_ok = 0
+        self._export_progress = QProgressDialog(
+            "正在导出图片...", None, 0, len(jobs), self)
+        self._export_progress.setWindowModality(Qt.WindowModal)
+        self._export_progress.setMinimumDuration(0)
+
+        if self._export_pool is None:
+            self._export_pool = QThreadPool(self)
+            self._export_pool.setMaxThreadCount(
+                min(4, max(2, QThread.idealThreadCount() - 1)))
+        for src, dst in jobs:
+            task = CopyRunnable(src, dst)
+            task.signals.done.connect(self._on_export_copy_done)
+            self._export_pool.start(task)
+
+    def _on_export_copy_done(self, ok):
+        """单个拷贝完成：推进进度条，整批结束后给出汇总"""
+        self._export_done += 1
+        if ok:
+            self._export_ok += 1
+        self._export_progress.setValue(self._export_done)
+        if self._export_done == self._export_total:
+            self.status_bar.showMessage(
+                f"已导出 {self._export_ok}/{self._export_total} "
+                f"张图片到 {self._export_dir}", 5000)
+            QMessageBox.information(
+                self,
+                "导出完成",
+                f"已成功导出 {self._export_ok} 张图片到:\n{self._export_dir}"
+            )
 
     def show_album_context_menu(self, position):
         """显示相册列表的右键菜单"""
@@ -1113,26 +1640,19 @@ class AlbumManager(QMainWindow):
         )
         
         if ok and new_name and new_name != old_name:
-            # 更新数据库
-            current_time = datetime.now().isoformat()
-            try:
-                self.db.cursor.execute("""
-                UPDATE albums 
-                SET name = ?, modify_time = ?
-                WHERE id = ?
-                """, (new_name, current_time, album_id))
-                self.db.conn.commit()
-                
-                # 更新列表
-                item = self.album_list.currentItem()
-                item.setText(new_name)
-                
-                # 更新标题
-                self.current_album_label.setText(f"图片管理 - {new_name}")
-                
-                self.status_bar.showMessage(f"已重命名图片集为: {new_name}")
-            except sqlite3.IntegrityError:
+            # 经由DatabaseManager更新，相册缓存随之失效
+            if not self.db.rename_album(album_id, new_name):
                 QMessageBox.warning(self, "错误", "图片集名称已存在")
+                return
+
+            # 更新列表
+            item = self.album_list.currentItem()
+            item.setText(new_name)
+
+            # 更新标题
+            self.current_album_label.setText(f"图片管理 - {new_name}")
+
+            self.status_bar.showMessage(f"已重命名图片集为: {new_name}")
 
     def closeEvent(self, event):
         """关闭应用时清理资源"""
@@ -1141,9 +1661,12 @@ class AlbumManager(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    
+
     # 设置应用样式
     app.setStyle(QStyleFactory.create("Fusion"))
+
+    # 200 MB缩略图缓存，跨相册切换复用已解码的位图
+    QPixmapCache.setCacheLimit(200 * 1024)
     
     window = AlbumManager()
     window.show()
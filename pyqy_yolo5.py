@@ -14,96 +14,85 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import sys
 import os
-import subprocess
-import ctypes
 from pathlib import Path
-import time
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import QThread, pyqtSignal, QSettings,QTimer
+from PyQt5.QtCore import QProcess, pyqtSignal, QObject, QSettings,QTimer
 from PyQt5.QtGui import QFont
 
-# Windows API定义
-if os.name == 'nt':
-    kernel32 = ctypes.windll.kernel32
-
-class TrainThread(QThread):
+class Trainer(QObject):
+    """用QProcess驱动训练子进程：输出由Qt事件循环批量排空，
+    不再需要专门的读线程和逐行跨线程信号"""
     update_log = pyqtSignal(str)
     finished = pyqtSignal()
     error_occurred = pyqtSignal(str)
-    _running = True
 
-    def __init__(self, command, cwd=None):
-        super().__init__()
-        self.command = command
-        self.cwd = cwd
-        self.process = None
-        self.pid = None
-
-    def run(self):
-        try:
-            self._running = True
-            # 创建独立的进程组（仅限Windows）
-            creationflags = 0
-            if os.name == 'nt':
-                creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-            
-            self.process = subprocess.Popen(
-                self.command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                cwd=self.cwd,
-                shell=True if os.name == 'nt' else False,
-                creationflags=creationflags
-            )
-            self.pid = self.process.pid
-            
-            for line in iter(self.process.stdout.readline, ''):
-                self.update_log.emit(line.strip())
-            self._running = True
-            while self._running:
-                line = self.process.stdout.readline()
-                if not line:  # 管道关闭时退出循环
-                    break
-                self.update_log.emit(line.strip())
-            self.process.wait()
-            if self.process.returncode != 0:
-                self.error_occurred.emit(f"训练异常结束，错误码：{self.process.returncode}")
-            else:
-                self.finished.emit()
-        except Exception as e:
-            if "I/O operation on closed file" in str(e):
-                self.error_occurred.emit("训练已安全终止")
-            else:
-                self.error_occurred.emit(f"运行时错误: {str(e)}")
-        finally:
-            self._running = False
-
-    def send_ctrl_c(self):
-        """发送终止信号时同时停止读取循环"""
-        self._running = False  # 停止读取循环
-        start_time = time.time()
-        if self.process and self.process.poll() is None:
-            if os.name == 'nt':
-                # Windows发送CTRL_C_EVENT
-                kernel32.GenerateConsoleCtrlEvent(0, self.pid)
-            else:
-                # Linux/Mac发送SIGINT
-                os.killpg(os.getpgid(self.pid), signal.SIGINT)
-            self.wait(1000)  # 等待1秒
-        #超时检测
-        while self.process.poll() is None and (time.time() - start_time) < 3:
-            time.sleep(0.1)
-        if self.process.poll() is None:
-            self.process.kill()
-        
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.proc = None
+        self._tail = b""       # 半行残留，凑齐换行再上报
+        self._stopping = False
+
+    def start(self, command, cwd=None):
+        self.proc = QProcess(self)
+        self.proc.setProcessChannelMode(QProcess.MergedChannels)
+        if cwd:
+            self.proc.setWorkingDirectory(str(cwd))
+        self.proc.readyReadStandardOutput.connect(self._on_ready_read)
+        self.proc.finished.connect(self._on_finished)
+        self.proc.errorOccurred.connect(self._on_error)
+        self.proc.start(command[0], command[1:])
+
+    def is_running(self):
+        return (self.proc is not None
+                and self.proc.state() != QProcess.NotRunning)
+
+    def _on_ready_read(self):
+        """一次读空管道里攒下的所有输出，整块emit"""
+        data = self._tail + bytes(self.proc.readAllStandardOutput())
+        lines = data.split(b'\n')
+        self._tail = lines.pop()
+        if lines:
+            self.update_log.emit("\n".join(
+                line.rstrip(b'\r').decode(errors='replace')
+                for line in lines))
+
+    def _on_error(self, error):
+        """启动失败时QProcess既不发started也不发finished，
+        必须在这里兜底报错；其余错误仍由finished统一收尾"""
+        if error == QProcess.FailedToStart:
+            self.error_occurred.emit(
+                f"无法启动训练进程: {self.proc.program()}")
+
+    def _on_finished(self, exit_code, exit_status):
+        if self._tail:
+            self.update_log.emit(self._tail.decode(errors='replace'))
+            self._tail = b""
+        if exit_code != 0 and not self._stopping:
+            self.error_occurred.emit(f"训练异常结束，错误码：{exit_code}")
+        else:
+            self.finished.emit()
+
+    def stop(self):
+        """先terminate给进程机会收尾，2秒未退出再kill"""
+        if self.is_running():
+            self._stopping = True
+            self.proc.terminate()
+            QTimer.singleShot(2000, self._force_kill)
+
+    def _force_kill(self):
+        if self.is_running():
+            self.proc.kill()
+
+
 
 class YOLOTrainer(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setup_paths()
+        # 整个生命周期共用一个QSettings，免得每次读写都重开注册表/INI
+        self._qsettings = QSettings("YOLOv5Trainer", "Config")
         self.initUI()
-        self.train_thread = None
+        self.trainer = None
 
     def setup_paths(self):
         self.settings = {
@@ -125,11 +114,19 @@ class YOLOTrainer(QMainWindow):
         self.font.setPointSize(10)
 
     def create_widgets(self):
-        # 路径配置部分
-        self.yolov5_root_group = self.create_path_group("YOLOv5根目录", is_file=False)
-        self.venv_python_group = self.create_path_group("Python环境路径", is_file=True)
-        self.data_yaml_group = self.create_path_group("数据集配置文件", is_file=True, 
-                                                     filter="YAML文件 (*.yaml *.yml)")
+        # 路径配置部分（输入框引用在创建时缓存，后续零findChild）
+        self.yolov5_root_group, self.yolov5_root_edit = \
+            self.create_path_group("YOLOv5根目录", is_file=False)
+        self.venv_python_group, self.venv_python_edit = \
+            self.create_path_group("Python环境路径", is_file=True)
+        self.data_yaml_group, self.data_yaml_edit = \
+            self.create_path_group("数据集配置文件", is_file=True,
+                                   filter="YAML文件 (*.yaml *.yml)")
+        # 路径校验结果按(root, python, yaml)元组记忆，输入变化即作废
+        self._last_validated = None
+        for line_edit in (self.yolov5_root_edit, self.venv_python_edit,
+                          self.data_yaml_edit):
+            line_edit.textChanged.connect(self._invalidate_validation)
         # 训练参数部分
         self.model_select = QComboBox()
         self.model_select.addItems(['yolov5s', 'yolov5m', 'yolov5l', 'yolov5x'])
@@ -153,21 +150,25 @@ class YOLOTrainer(QMainWindow):
         # 日志部分
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
+        # 限制日志块数并关闭undo栈：长时间训练下append保持近似常数开销，
+        # 文档不会无限膨胀
+        self.log_output.document().setMaximumBlockCount(5000)
+        self.log_output.setUndoRedoEnabled(False)
 
     def create_path_group(self, title, is_file=False, filter=None):
-        """创建包含路径输入框和浏览按钮的完整组"""
+        """创建包含路径输入框和浏览按钮的完整组，返回(组, 输入框)"""
         group = QGroupBox(title)
         layout = QHBoxLayout(group)
-        
-        self.line_edit = QLineEdit()
-        self.line_edit.setFont(self.font)
-        self.browse_btn = QPushButton("浏览...")
-        self.browse_btn.clicked.connect(
-            lambda: self.select_path(self.line_edit, is_file, filter=filter))
-        
-        layout.addWidget(self.line_edit)
-        layout.addWidget(self.browse_btn)
-        return group
+
+        line_edit = QLineEdit()
+        line_edit.setFont(self.font)
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(
+            lambda: self.select_path(line_edit, is_file, filter=filter))
+
+        layout.addWidget(line_edit)
+        layout.addWidget(browse_btn)
+        return group, line_edit
 
     def create_layout(self):
         main_widget = QWidget()
@@ -231,38 +232,51 @@ class YOLOTrainer(QMainWindow):
             target_input.setText(Path(path).as_posix())
 
     def validate_paths(self):
+        # 输入没动过就直接用上次的校验结果，省掉重复stat
+        paths = (self.yolov5_root_edit.text(),
+                 self.venv_python_edit.text(),
+                 self.data_yaml_edit.text())
+        if self._last_validated is not None \
+                and self._last_validated[0] == paths:
+            return self._last_validated[1]
+
         errors = []
         # 修改后的路径检查方式
         path_checks = [
-            (self.yolov5_root_group, 
-             "YOLOv5根目录", 
+            (self.yolov5_root_edit,
+             "YOLOv5根目录",
              lambda p: (p/"train.py").exists()),
-            (self.venv_python_group, 
-             "Python环境路径", 
+            (self.venv_python_edit,
+             "Python环境路径",
              lambda p: p.exists() and "python" in p.name.lower()),
-            (self.data_yaml_group, 
-             "数据集配置文件", 
+            (self.data_yaml_edit,
+             "数据集配置文件",
              lambda p: p.exists() and p.suffix in ['.yaml', '.yml'])
         ]
 
-        for group, name, validator in path_checks:
-            path = Path(self.get_path_from_group(group))
+        for line_edit, name, validator in path_checks:
+            path = Path(line_edit.text())
             if not path.exists():
                 errors.append(f"{name}不存在")
             elif not validator(path):
                 errors.append(f"{name}无效")
 
+        self._last_validated = (paths, errors)
         return errors
 
+    def _invalidate_validation(self):
+        """路径输入变化后作废校验缓存"""
+        self._last_validated = None
+
     def start_training(self):
         if errors := self.validate_paths():
             QMessageBox.critical(self, "配置错误", "\n".join(errors))
             return
 
         self.save_settings()
-        yolov5_root = Path(self.get_path_from_group(self.yolov5_root_group))
-        venv_python = Path(self.get_path_from_group(self.venv_python_group))
-        data_yaml = Path(self.get_path_from_group(self.data_yaml_group))
+        yolov5_root = Path(self.yolov5_root_edit.text())
+        venv_python = Path(self.venv_python_edit.text())
+        data_yaml = Path(self.data_yaml_edit.text())
         
         # 构造命令时需要验证模型文件路径
         model_file = yolov5_root / "models" / f"{self.model_select.currentText()}.yaml"
@@ -287,54 +301,24 @@ class YOLOTrainer(QMainWindow):
         ]
 
         self.log_output.clear()
-        self.train_thread = TrainThread(command, cwd=yolov5_root)
-        self.train_thread.update_log.connect(self.log_output.append)
-        self.train_thread.finished.connect(self.training_finished)
-        self.train_thread.error_occurred.connect(self.show_error)
-        self.train_thread.start()
+        self.trainer = Trainer(self)
+        self.trainer.update_log.connect(self.log_output.append)
+        self.trainer.finished.connect(self.training_finished)
+        self.trainer.error_occurred.connect(self.show_error)
+        self.trainer.start(command, cwd=yolov5_root)
 
         self.train_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
 
     def stop_training(self):
-        if self.train_thread and self.train_thread.isRunning():
+        if self.trainer and self.trainer.is_running():
             self.stop_btn.setEnabled(False)
             self.log_output.append("正在发送停止信号...")
-            
-            # 使用异步操作避免阻塞
-            QTimer.singleShot(0, self._safe_stop_training)
-
-    def _safe_stop_training(self):
-        """安全的停止训练流程"""
-        try:
-            # 发送Ctrl+C信号
-            self.train_thread.send_ctrl_c()
-            
-            # 检查是否真正退出
-            if self.train_thread.isRunning():
-                self.log_output.append("进程未正常退出，尝试强制终止...")
-                self.train_thread.process.kill()
-                self.train_thread.wait(1000)
-                
-            self.training_finished()
-        except Exception as e:
-            self.log_output.append(f"停止失败: {str(e)}")
-        finally:
-            self.stop_btn.setEnabled(True)
+            # terminate/kill由Trainer异步推进，退出后走finished信号
+            self.trainer.stop()
 
     def training_finished(self):
-        """清理资源"""
-        if self.train_thread:
-            try:
-                if self.train_thread.process:
-                    self.train_thread.process.stdout.close()
-                    self.train_thread.process.stderr.close()
-                    self.train_thread.process = None
-            except:
-                pass
-            self.train_thread.quit()
-            self.train_thread.wait()
-            
+        """训练结束后恢复按钮状态"""
         self.train_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.log_output.append("训练已停止")
@@ -345,7 +329,8 @@ class YOLOTrainer(QMainWindow):
 
     def closeEvent(self, event):
         self.save_settings()
-        if self.train_thread and self.train_thread.isRunning():
+        self._qsettings.sync()  # 退出前显式落盘一次
+        if self.trainer and self.trainer.is_running():
             reply = QMessageBox.question(
                 self, '训练正在进行',
                 "训练仍在运行，确定要退出吗？",
@@ -359,21 +344,17 @@ class YOLOTrainer(QMainWindow):
         else:
             event.accept()
 
-    def get_path_from_group(self, group):
-        """从路径组中获取输入框内容"""
-        return group.findChild(QLineEdit).text()
-
     def save_settings(self):
-        settings = QSettings("YOLOv5Trainer", "Config")
-        settings.setValue("yolov5_root", self.get_path_from_group(self.yolov5_root_group))
-        settings.setValue("venv_python", self.get_path_from_group(self.venv_python_group))
-        settings.setValue("data_yaml", self.get_path_from_group(self.data_yaml_group))
+        settings = self._qsettings
+        settings.setValue("yolov5_root", self.yolov5_root_edit.text())
+        settings.setValue("venv_python", self.venv_python_edit.text())
+        settings.setValue("data_yaml", self.data_yaml_edit.text())
 
     def load_settings(self):
-        settings = QSettings("YOLOv5Trainer", "Config")
-        self.yolov5_root_group.findChild(QLineEdit).setText(settings.value("yolov5_root", ""))
-        self.venv_python_group.findChild(QLineEdit).setText(settings.value("venv_python", ""))
-        self.data_yaml_group.findChild(QLineEdit).setText(settings.value("data_yaml", ""))
+        settings = self._qsettings
+        self.yolov5_root_edit.setText(settings.value("yolov5_root", ""))
+        self.venv_python_edit.setText(settings.value("venv_python", ""))
+        self.data_yaml_edit.setText(settings.value("data_yaml", ""))
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = YOLOTrainer()